@@ -1,36 +1,189 @@
 #!/usr/bin/env python3
 
+from concurrent.futures import ProcessPoolExecutor
 from math import inf
 from pathlib import Path
+import heapq
+import os
 import sys
-from collections.abc import Collection
+from collections.abc import Collection, Iterable, Iterator, MutableSequence
+
+import numpy as np
 
 
 class Elf:
 
     food_items: Collection[int]
 
-    def __init__(self, food_items) -> None:
+    def __init__(self, food_items, total_cals=None) -> None:
         self.food_items = food_items
-        self.total_cals = self.calc_total_calories()
+        if total_cals is None:
+            total_cals = self.calc_total_calories()
+        self.total_cals = total_cals
 
     def calc_total_calories(self):
         return sum(self.food_items)
 
 
+class ElfCohortView(MutableSequence):
+    # List-like view of the Elves in an array-backed `ElfCohort`. Appending
+    # is buffered by the cohort; other edits rebuild its arrays.
+
+    def __init__(self, cohort) -> None:
+        self.cohort = cohort
+
+    def __len__(self):
+        return len(self.cohort)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ElfCohort index out of range")
+        return self.cohort.get_elf(index)
+
+    def __setitem__(self, index, elf):
+        elves = list(self)
+        elves[index] = elf
+        self.cohort.set_elves(elves)
+
+    def __delitem__(self, index):
+        elves = list(self)
+        del elves[index]
+        self.cohort.set_elves(elves)
+
+    def insert(self, index, elf):
+        elves = list(self)
+        elves.insert(index, elf)
+        self.cohort.set_elves(elves)
+
+    def append(self, elf):
+        self.cohort.add_elf(elf)
+
+
 class ElfCohort:
 
-    elves: Collection[Elf]
+    # Food items of every Elf, concatenated into one flat array
+    _items: np.ndarray
+    # Elf `i` owns `items[offsets[i]:offsets[i+1]]`
+    _offsets: np.ndarray
+    _total_cals: np.ndarray
+    # Elves added since the arrays were last built
+    pending_elves: list[Elf]
 
     def __init__(self, elves=None) -> None:
-        self.elves = elves or []
+        self.set_elves(elves or [])
+
+    @classmethod
+    def from_arrays(cls, items, offsets):
+        cohort = cls()
+        cohort.set_arrays(items, offsets)
+        return cohort
+
+    def set_elves(self, elves):
+        self.set_arrays([], [0])
+        self.pending_elves = list(elves)
+
+    def set_arrays(self, items, offsets):
+        self._items = np.asarray(items, dtype=np.int64)
+        self._offsets = np.asarray(offsets, dtype=np.int64)
+        self._total_cals = self.calc_total_calories(self._items, self._offsets)
+        self.pending_elves = []
+
+    def build_arrays(self):
+        # Append the pending Elves to the arrays in one go
+        if not self.pending_elves:
+            return
+        new_items = [item for elf in self.pending_elves for item in elf.food_items]
+        new_items = np.asarray(new_items, dtype=np.int64)
+        new_sizes = [len(elf.food_items) for elf in self.pending_elves]
+        new_offsets = np.cumsum([0] + new_sizes, dtype=np.int64)
+        new_total_cals = self.calc_total_calories(new_items, new_offsets)
+        self._items = np.concatenate([self._items, new_items])
+        self._offsets = np.concatenate([self._offsets, self._offsets[-1] + new_offsets[1:]])
+        self._total_cals = np.concatenate([self._total_cals, new_total_cals])
+        self.pending_elves = []
+
+    @property
+    def items(self):
+        self.build_arrays()
+        return self._items
+
+    @property
+    def offsets(self):
+        self.build_arrays()
+        return self._offsets
+
+    @property
+    def total_cals(self):
+        self.build_arrays()
+        return self._total_cals
+
+    @staticmethod
+    def calc_total_calories(items, offsets):
+        starts, ends = offsets[:-1], offsets[1:]
+        total_cals = np.zeros(len(starts), dtype=np.int64)
+        # `reduceat` misbehaves on empty segments, so only sum non-empty Elves
+        # (their starts remain contiguous since empty Elves take up no items)
+        nonempty = ends > starts
+        if nonempty.any():
+            total_cals[nonempty] = np.add.reduceat(items, starts[nonempty])
+        return total_cals
+
+    def __len__(self):
+        return len(self.total_cals)
+
+    def get_elf(self, index: int):
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return Elf(self.items[start:end], int(self.total_cals[index]))
+
+    @property
+    def elves(self):
+        return ElfCohortView(self)
 
     def add_elf(self, elf: Elf):
-        self.elves.append(elf)
+        self.pending_elves.append(elf)
 
     def find_elves_with_most_calories(self, n: int = 1):
-        ranked = sorted(self.elves, key=lambda x: x.total_cals, reverse=True)
-        return ranked[:n]
+        n = min(n, len(self))
+        if n == 0:
+            return []
+        total_cals = self.total_cals
+        # Take every Elf above the n-th largest total, then fill up with the
+        # earliest Elves tied at it, as a stable sort would
+        threshold = np.partition(total_cals, len(self) - n)[len(self) - n]
+        above = np.flatnonzero(total_cals > threshold)
+        tied = np.flatnonzero(total_cals == threshold)[:n - len(above)]
+        top = np.concatenate([above, tied])
+        # Rank by decreasing total, keeping cohort order for ties
+        top = top[np.lexsort((top, -total_cals[top]))]
+        return [self.get_elf(i) for i in top]
+
+
+class TopCalorieTracker:
+
+    n: int
+    heap: list[int]
+
+    def __init__(self, n: int = 1) -> None:
+        self.n = n
+        # Min-heap holding the `n` largest totals seen so far
+        self.heap = []
+
+    def add_total(self, total_cals: int):
+        if len(self.heap) < self.n:
+            heapq.heappush(self.heap, total_cals)
+        elif total_cals > self.heap[0]:
+            heapq.heapreplace(self.heap, total_cals)
+
+    def add_totals(self, totals: Iterable[int]):
+        for total_cals in totals:
+            self.add_total(total_cals)
+
+    def get_top_totals(self):
+        return sorted(self.heap, reverse=True)
 
 
 class CohortParser:
@@ -44,21 +197,93 @@ class CohortParser:
         with open(self.path, "r") as infile:
             contents = infile.read()
         blocks = contents.split("\n\n")
-        cohort = ElfCohort()
+        items = []
+        offsets = [0]
         for block in blocks:
             block = block.strip()
-            items = block.split("\n")
-            items = [int(i) for i in items]
-            elf = Elf(items)
-            cohort.add_elf(elf)
-        return cohort
+            items.extend(int(i) for i in block.split("\n"))
+            offsets.append(len(items))
+        return ElfCohort.from_arrays(items, offsets)
+
+    def iter_totals(self) -> Iterator[int]:
+        # Stream the file line by line, only keeping a running total
+        with open(self.path, "r") as infile:
+            yield from iter_block_totals(infile)
+
+    def split_ranges(self, num_chunks: int):
+        # Split the file into byte ranges that each start right after a
+        # blank line, so that no Elf straddles two ranges
+        file_size = os.path.getsize(self.path)
+        boundaries = [0]
+        with open(self.path, "rb") as infile:
+            for i in range(1, num_chunks):
+                offset = max(file_size * i // num_chunks, boundaries[-1])
+                infile.seek(offset)
+                # Skip the (possibly partial) line at the offset
+                infile.readline()
+                for line in iter(infile.readline, b""):
+                    if not line.strip():
+                        break
+                boundaries.append(infile.tell())
+        boundaries.append(file_size)
+        ranges = zip(boundaries[:-1], boundaries[1:])
+        return [(start, end) for start, end in ranges if start < end]
+
+    def find_most_calories(self, n: int = 1, workers: int = 1):
+        tracker = TopCalorieTracker(n)
+        if workers > 1:
+            ranges = self.split_ranges(workers)
+            with ProcessPoolExecutor(workers) as executor:
+                futures = [
+                    executor.submit(find_top_totals_in_range, self.path, start, end, n)
+                    for start, end in ranges
+                ]
+                # Merge the partial top-n heaps from each range
+                for future in futures:
+                    tracker.add_totals(future.result())
+        else:
+            tracker.add_totals(self.iter_totals())
+        return tracker.get_top_totals()
+
+
+def iter_block_totals(lines: Iterable) -> Iterator[int]:
+    total_cals = 0
+    has_items = False
+    for line in lines:
+        line = line.strip()
+        if line:
+            total_cals += int(line)
+            has_items = True
+        elif has_items:
+            yield total_cals
+            total_cals = 0
+            has_items = False
+    if has_items:
+        yield total_cals
+
+
+def iter_lines_in_range(infile, start: int, end: int):
+    infile.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        line = infile.readline()
+        if not line:
+            break
+        remaining -= len(line)
+        yield line
+
+
+def find_top_totals_in_range(path, start: int, end: int, n: int):
+    tracker = TopCalorieTracker(n)
+    with open(path, "rb") as infile:
+        lines = iter_lines_in_range(infile, start, end)
+        tracker.add_totals(iter_block_totals(lines))
+    return tracker.heap
 
 
 if __name__ == "__main__":
     input_path = Path(sys.argv[1])
     parser = CohortParser(input_path)
-    cohort = parser.parse()
-    most_calories_elves = cohort.find_elves_with_most_calories(n=3)
-    most_calories_nums = [e.total_cals for e in most_calories_elves]
+    most_calories_nums = parser.find_most_calories(n=3)
     print("Part 1:", most_calories_nums[0])
     print("Part 2:", sum(most_calories_nums))
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 
+from collections import Counter
 from collections.abc import Mapping, Collection
 from enum import Enum, auto
 from pathlib import Path
@@ -93,7 +94,22 @@ class Tournament:
         self.rounds.append(round)
 
     def calc_total_score(self):
-        return sum(r.calc_score() for r in self.rounds)
+        return sum(r.score for r in self.rounds)
+
+
+class ScoreTable:
+
+    # Score for each of the 9 possible (stripped) guide lines, e.g. b"A X"
+    scores: Mapping[bytes, int]
+
+    def __init__(self, scores) -> None:
+        self.scores = scores
+
+    def score_line(self, line: bytes):
+        return self.scores[line.strip()]
+
+    def score_counts(self, line_counts: Mapping[bytes, int]):
+        return sum(self.scores[line] * count for line, count in line_counts.items())
 
 
 class GuideParser:
@@ -124,15 +140,24 @@ class GuideParser:
     def parse_outcome(self, code):
         return self.code_outcome_map[code]
 
+    def make_round_1(self, code_1, code_2):
+        hand_1, hand_2 = self.parse_hand(code_1), self.parse_hand(code_2)
+        # Swapping hands 1 and 2 since the second column is us
+        return RockPaperScissors(hand_2, hand_1)
+
+    def make_round_2(self, code_1, code_2):
+        hand_2 = self.parse_hand(code_1)
+        desired_outcome = self.parse_outcome(code_2)
+        hand_1 = RockPaperScissors.hand_1_from_outcome(hand_2, desired_outcome)
+        return RockPaperScissors(hand_1, hand_2)
+
     def parse_part_1(self):
         with open(self.path) as infile:
             tournament = Tournament()
             for line in infile:
                 line = line.strip()
                 code_1, code_2 = line.split(" ")
-                hand_1, hand_2 = self.parse_hand(code_1), self.parse_hand(code_2)
-                # Swapping hands 1 and 2 since the second column is us
-                round = RockPaperScissors(hand_2, hand_1)
+                round = self.make_round_1(code_1, code_2)
                 tournament.add_round(round)
                 # print(f"Round: {line} = {round.calc_score()}")
         return tournament
@@ -143,20 +168,55 @@ class GuideParser:
             for line in infile:
                 line = line.strip()
                 code_1, code_2 = line.split(" ")
-                hand_2 = self.parse_hand(code_1)
-                desired_outcome = self.parse_outcome(code_2)
-                hand_1 = RockPaperScissors.hand_1_from_outcome(hand_2, desired_outcome)
-                round = RockPaperScissors(hand_1, hand_2)
+                round = self.make_round_2(code_1, code_2)
                 tournament.add_round(round)
-                # print(f"Round: {hand_1.name} {hand_2.name} = {round.calc_score()}")
+                # print(f"Round: {round.hand_1.name} {round.hand_2.name} = {round.calc_score()}")
         return tournament
 
+    def build_score_table(self, part):
+        make_round = self.make_round_1 if part == 1 else self.make_round_2
+        scores = {}
+        for code_1 in "ABC":
+            for code_2 in "XYZ":
+                line = f"{code_1} {code_2}".encode()
+                scores[line] = make_round(code_1, code_2).score
+        return ScoreTable(scores)
+
+    def count_lines(self):
+        # Only 9 distinct lines are possible, so a histogram is all we need
+        with open(self.path, "rb") as infile:
+            line_counts = Counter(map(bytes.strip, infile))
+        line_counts.pop(b"", None)
+        return line_counts
+
+    def calc_total_score(self, part):
+        score_table = self.build_score_table(part)
+        return score_table.score_counts(self.count_lines())
+
+    def parse_both_parts(self):
+        with open(self.path) as infile:
+            tournament_1, tournament_2 = Tournament(), Tournament()
+            for line in infile:
+                line = line.strip()
+                code_1, code_2 = line.split(" ")
+                tournament_1.add_round(self.make_round_1(code_1, code_2))
+                tournament_2.add_round(self.make_round_2(code_1, code_2))
+        return tournament_1, tournament_2
+
+    def calc_total_scores(self, keep_rounds=False):
+        # Score both parts from a single pass over the guide. Rounds are
+        # only kept (in `self.tournaments`) when requested for debugging
+        if keep_rounds:
+            self.tournaments = self.parse_both_parts()
+            return tuple(t.calc_total_score() for t in self.tournaments)
+        line_counts = self.count_lines()
+        score_tables = [self.build_score_table(part) for part in (1, 2)]
+        return tuple(t.score_counts(line_counts) for t in score_tables)
+
 
 if __name__ == "__main__":
     input_path = sys.argv[1]
-    parser_1 = GuideParser(input_path)
-    tournament_1 = parser_1.parse_part_1()
-    print("Part 1:", tournament_1.calc_total_score())
-    parser_2 = GuideParser(input_path)
-    tournament_2 = parser_2.parse_part_2()
-    print("Part 2:", tournament_2.calc_total_score())
+    parser = GuideParser(input_path)
+    total_score_1, total_score_2 = parser.calc_total_scores()
+    print("Part 1:", total_score_1)
+    print("Part 2:", total_score_2)
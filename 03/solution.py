@@ -1,8 +1,11 @@
 #!/usr/bin/env python3
 
-from collections.abc import Collection, MutableSet
+from collections.abc import Collection, MutableSet, Sequence
 from functools import reduce
+from operator import and_, or_
+from string import ascii_letters
 import sys
+import warnings
 
 class Rucksack:
 
@@ -31,6 +34,38 @@ class Rucksack:
         return sum(self.calc_priority(x) for x in common_items)
 
 
+class BitmaskRucksack:
+
+    # Bit `priority - 1` for each item byte (a-z then A-Z), 0 for anything else
+    item_bits: Sequence[int] = [
+        1 << ascii_letters.index(chr(byte)) if chr(byte) in ascii_letters else 0
+        for byte in range(256)
+    ]
+
+    masks: Sequence[int]
+
+    def __init__(self, *sections: Collection[str] | bytes):
+        self.masks = [self.encode(s) for s in sections]
+
+    @classmethod
+    def encode(cls, section):
+        if isinstance(section, str):
+            section = section.encode()
+        return reduce(or_, map(cls.item_bits.__getitem__, section), 0)
+
+    def find_common_items(self) -> int:
+        return reduce(and_, self.masks)
+
+    def calc_priority_of_common_items(self):
+        common_items = self.find_common_items()
+        total_priority = 0
+        while common_items:
+            lowest_bit = common_items & -common_items
+            total_priority += lowest_bit.bit_length()
+            common_items ^= lowest_bit
+        return total_priority
+
+
 class InputParser:
 
     path: str
@@ -38,39 +73,53 @@ class InputParser:
     def __init__(self, path) -> None:
         self.path = path
 
-    def parse_1(self):
+    def parse_1(self, rucksack_cls=Rucksack):
         rucksacks = []
         with open(self.path, "r") as infile:
             for line in infile:
                 line = line.strip()
                 halfway_point = len(line) // 2
                 half_1, half_2 = line[:halfway_point], line[halfway_point:]
-                rucksack = Rucksack(half_1, half_2)
+                rucksack = rucksack_cls(half_1, half_2)
                 rucksacks.append(rucksack)
         return rucksacks
 
-    def parse_2(self):
-        rucksacks = []
+    def parse_2(self, rucksack_cls=Rucksack, group_size=3):
+        return list(self.iter_groups(rucksack_cls, group_size))
+
+    def iter_groups(self, rucksack_cls=Rucksack, group_size=3):
+        # Lines left over at the end (fewer than `group_size`) are reported
+        # with a warning. They are also stored in `self.incomplete_group`,
+        # which is only set once the generator has been exhausted.
+        if group_size < 1:
+            raise ValueError(f"group_size must be at least 1, got {group_size}")
+        self.incomplete_group = None
         with open(self.path, "r") as infile:
-            triplet = []
+            group = []
             for line in infile:
                 line = line.strip()
-                triplet.append(line)
-                if len(triplet) == 3:
-                    rucksack = Rucksack(*triplet)
-                    rucksacks.append(rucksack)
-                    triplet = []
-        return rucksacks
+                group.append(line)
+                if len(group) == group_size:
+                    yield rucksack_cls(*group)
+                    group = []
+        if group:
+            warnings.warn(
+                f"Ignoring incomplete group of {len(group)} rucksack(s) at end of input"
+            )
+        self.incomplete_group = group
+
+    def iter_group_priorities(self, rucksack_cls=BitmaskRucksack, group_size=3):
+        for rucksack in self.iter_groups(rucksack_cls, group_size):
+            yield rucksack.calc_priority_of_common_items()
 
 
 if __name__ == "__main__":
     input_path = sys.argv[1]
     parser = InputParser(input_path)
     # Part 1
-    rucksacks = parser.parse_1()
+    rucksacks = parser.parse_1(BitmaskRucksack)
     priorities = sum(r.calc_priority_of_common_items() for r in rucksacks)
     print("Part 1:", priorities)
     # Part 2
-    rucksacks = parser.parse_2()
-    priorities = sum(r.calc_priority_of_common_items() for r in rucksacks)
+    priorities = sum(parser.iter_group_priorities(group_size=3))
     print("Part 2:", priorities)
@@ -2,8 +2,12 @@
 
 from __future__ import annotations
 
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Sequence
 import sys
 
+import numpy as np
+
 
 class Range:
 
@@ -29,6 +33,127 @@ class Range:
         return False
 
 
+class IntervalNode:
+
+    center: int
+    # Ranges containing `center`, sorted by increasing start / decreasing end
+    by_start: Sequence[Range]
+    by_end: Sequence[Range]
+    left: IntervalNode | None
+    right: IntervalNode | None
+
+    def __init__(self, ranges: Sequence[Range]):
+        endpoints = sorted(x for r in ranges for x in (r.start, r.end))
+        self.center = endpoints[len(endpoints) // 2]
+        here, left, right = [], [], []
+        for r in ranges:
+            if r.end < self.center:
+                left.append(r)
+            elif r.start > self.center:
+                right.append(r)
+            else:
+                here.append(r)
+        self.by_start = sorted(here, key=lambda r: r.start)
+        self.by_end = sorted(here, key=lambda r: r.end, reverse=True)
+        self.left = IntervalNode(left) if left else None
+        self.right = IntervalNode(right) if right else None
+
+
+class RangeIndex:
+
+    root: IntervalNode | None
+    starts: Sequence[int]
+    ends: Sequence[int]
+
+    def __init__(self, ranges: Iterable[Range] = ()):
+        self.load(ranges)
+
+    def load(self, ranges: Iterable[Range]):
+        ranges = list(ranges)
+        self.root = IntervalNode(ranges) if ranges else None
+        self.starts = sorted(r.start for r in ranges)
+        self.ends = sorted(r.end for r in ranges)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def find_overlapping(self, query: Range):
+        overlapping = []
+        stack = [self.root] if self.root else []
+        while stack:
+            node = stack.pop()
+            if query.end < node.center:
+                # Node ranges all end at or after the center, past the query
+                for r in node.by_start:
+                    if r.start > query.end:
+                        break
+                    overlapping.append(r)
+                next_nodes = [node.left]
+            elif query.start > node.center:
+                # Node ranges all start at or before the center, before the query
+                for r in node.by_end:
+                    if r.end < query.start:
+                        break
+                    overlapping.append(r)
+                next_nodes = [node.right]
+            else:
+                overlapping.extend(node.by_start)
+                next_nodes = [node.left, node.right]
+            stack.extend(n for n in next_nodes if n is not None)
+        return overlapping
+
+    def find_containing_point(self, point: int):
+        return self.find_overlapping(Range(point, point))
+
+    def find_containing(self, query: Range):
+        candidates = self.find_containing_point(query.start)
+        return [r for r in candidates if query.is_contained_by(r)]
+
+    def find_contained_by(self, query: Range):
+        candidates = self.find_overlapping(query)
+        return [r for r in candidates if r.is_contained_by(query)]
+
+    def count_overlapping(self, query: Range):
+        # Everything overlaps except ranges entirely before or after the query
+        num_before = bisect_left(self.ends, query.start)
+        num_after = len(self) - bisect_right(self.starts, query.end)
+        return len(self) - num_before - num_after
+
+    def count_containing_point(self, point: int):
+        return self.count_overlapping(Range(point, point))
+
+
+class RangePairArray:
+
+    start_1: np.ndarray
+    end_1: np.ndarray
+    start_2: np.ndarray
+    end_2: np.ndarray
+
+    def __init__(self, start_1, end_1, start_2, end_2):
+        self.start_1 = start_1
+        self.end_1 = end_1
+        self.start_2 = start_2
+        self.end_2 = end_2
+
+    def __len__(self):
+        return len(self.start_1)
+
+    def find_redundant(self):
+        first_in_second = (self.start_1 >= self.start_2) & (self.end_1 <= self.end_2)
+        second_in_first = (self.start_2 >= self.start_1) & (self.end_2 <= self.end_1)
+        return first_in_second | second_in_first
+
+    def find_overlapping(self):
+        return (self.end_1 >= self.start_2) & (self.start_1 <= self.end_2)
+
+    def count_redundant(self):
+        return int(np.count_nonzero(self.find_redundant()))
+
+    def count_overlapping(self):
+        return int(np.count_nonzero(self.find_overlapping()))
+
+
 class InputParser:
 
     path: str
@@ -47,6 +172,19 @@ class InputParser:
                 range_pairs.append((range_1, range_2))
         return range_pairs
 
+    def parse_index(self):
+        ranges = [r for pair in self.parse() for r in pair]
+        return RangeIndex(ranges)
+
+    def parse_columns(self):
+        with open(self.path, "r") as infile:
+            contents = infile.read()
+        # Turn "a-b,c-d" lines into a flat whitespace-separated list of ints
+        contents = contents.translate(str.maketrans("-,", "  "))
+        values = np.fromstring(contents, dtype=np.int32, sep=" ")
+        columns = values.reshape(-1, 4).T.copy()
+        return RangePairArray(*columns)
+
 
 def is_redundant(range_1, range_2):
     return range_1.is_contained_by(range_2) or range_2.is_contained_by(range_1)
@@ -58,10 +196,10 @@ def is_overlapping(range_1, range_2):
 if __name__ == "__main__":
     input_path = sys.argv[1]
     parser = InputParser(input_path)
-    range_pairs = parser.parse()
+    range_pairs = parser.parse_columns()
     # Part 1
-    num_redundant_pairs = sum(is_redundant(r1, r2) for r1, r2 in range_pairs)
+    num_redundant_pairs = range_pairs.count_redundant()
     print("Part 1:", num_redundant_pairs)
     # Part 2
-    num_overlapping_pairs = sum(is_overlapping(r1, r2) for r1, r2 in range_pairs)
+    num_overlapping_pairs = range_pairs.count_overlapping()
     print("Part 2:", num_overlapping_pairs)
@@ -1,8 +1,10 @@
 #!/usr/bin/env python3
 
+from array import array
 from collections import defaultdict
 from collections.abc import Mapping, Sequence
 from pathlib import Path
+import random
 import re
 import sys
 
@@ -22,7 +24,7 @@ class Stacks:
 
     def move_2(self, num, source, target):
         crates = self.stacks[source][-num:]
-        self.stacks[source] = self.stacks[source][:-num]
+        del self.stacks[source][-num:]
         self.stacks[target].extend(crates)
 
     def get_top_crates(self):
@@ -33,6 +35,166 @@ class Stacks:
         return "".join(top_crates)
 
 
+class RopeNode:
+    __slots__ = ("crate", "priority", "size", "left", "right", "flipped")
+
+    def __init__(self, crate) -> None:
+        self.crate = crate
+        self.priority = random.random()
+        self.size = 1
+        self.left = None
+        self.right = None
+        # Whether this subtree still needs to be reversed (applied lazily)
+        self.flipped = False
+
+
+class RopeStack:
+
+    root: RopeNode | None
+
+    def __init__(self, crates=()) -> None:
+        self.root = None
+        for crate in crates:
+            self.append(crate)
+
+    def __len__(self):
+        return self._size(self.root)
+
+    def __iter__(self):
+        stack, node = [], self.root
+        while stack or node:
+            while node:
+                self._push_down(node)
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.crate
+            node = node.right
+
+    def __getitem__(self, index: int):
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("RopeStack index out of range")
+        node = self.root
+        while True:
+            self._push_down(node)
+            left_size = self._size(node.left)
+            if index < left_size:
+                node = node.left
+            elif index == left_size:
+                return node.crate
+            else:
+                index -= left_size + 1
+                node = node.right
+
+    def append(self, crate):
+        self.root = self._merge(self.root, RopeNode(crate))
+
+    def split_top(self, num: int):
+        top = RopeStack()
+        self.root, top.root = self._split(self.root, len(self) - num)
+        return top
+
+    def push_stack(self, other: 'RopeStack', reverse=False):
+        if reverse and other.root:
+            other.root.flipped = not other.root.flipped
+        self.root = self._merge(self.root, other.root)
+        other.root = None
+
+    @staticmethod
+    def _size(node):
+        return node.size if node else 0
+
+    @classmethod
+    def _update(cls, node):
+        node.size = 1 + cls._size(node.left) + cls._size(node.right)
+
+    @staticmethod
+    def _push_down(node):
+        if node.flipped:
+            node.left, node.right = node.right, node.left
+            for child in (node.left, node.right):
+                if child:
+                    child.flipped = not child.flipped
+            node.flipped = False
+
+    @classmethod
+    def _merge(cls, left, right):
+        if not left:
+            return right
+        if not right:
+            return left
+        if left.priority > right.priority:
+            cls._push_down(left)
+            left.right = cls._merge(left.right, right)
+            cls._update(left)
+            return left
+        cls._push_down(right)
+        right.left = cls._merge(left, right.left)
+        cls._update(right)
+        return right
+
+    @classmethod
+    def _split(cls, node, num: int):
+        # Split into the bottom `num` crates and the rest
+        if not node:
+            return None, None
+        cls._push_down(node)
+        if cls._size(node.left) >= num:
+            left, node.left = cls._split(node.left, num)
+            cls._update(node)
+            return left, node
+        node.right, right = cls._split(node.right, num - cls._size(node.left) - 1)
+        cls._update(node)
+        return node, right
+
+
+class RopeStacks(Stacks):
+
+    stacks: Mapping[int, RopeStack]
+
+    def __init__(self, stacks):
+        self.stacks = dict()
+        for num, sequence in stacks.items():
+            self.stacks[num] = RopeStack(sequence)
+
+    def move_1(self, num, source, target):
+        # Moving one crate at a time reverses the moved block
+        crates = self.stacks[source].split_top(num)
+        self.stacks[target].push_stack(crates, reverse=True)
+
+    def move_2(self, num, source, target):
+        crates = self.stacks[source].split_top(num)
+        self.stacks[target].push_stack(crates)
+
+
+class MoveLog:
+
+    # Flat (num, source, target) triplets, one per move
+    moves: array
+
+    def __init__(self) -> None:
+        self.moves = array("l")
+
+    def __len__(self):
+        return len(self.moves) // 3
+
+    def __iter__(self):
+        moves_iter = iter(self.moves)
+        return zip(moves_iter, moves_iter, moves_iter)
+
+    def add_move(self, num, source, target):
+        self.moves.extend((num, source, target))
+
+    def replay(self, stacks, move_mode):
+        move = get_move_method(stacks, move_mode)
+        for num, source, target in self:
+            move(num, source, target)
+        return stacks
+
+
 class InputParser:
 
     path: Path
@@ -40,7 +202,7 @@ class InputParser:
     def __init__(self, path):
         self.path = path
 
-    def parse_stacks(self, text):
+    def parse_stacks(self, text, stacks_cls=Stacks):
         stacks_dict = defaultdict(list)
         lines = text.split("\n")
         # Remove stack numbers
@@ -51,7 +213,7 @@ class InputParser:
             for stack_id, character in enumerate(line, start=1):
                 if character.strip():
                     stacks_dict[stack_id].append(character)
-        return Stacks(stacks_dict)
+        return stacks_cls(stacks_dict)
 
     def parse_moves(self, stacks, text, move_mode):
         text = text.strip()
@@ -64,24 +226,57 @@ class InputParser:
                 stacks.move_2(num, source, target)
         return stacks
 
-    def parse(self, move_mode):
+    def parse(self, move_mode, stacks_cls=Stacks):
         with open(self.path, "r") as infile:
             contents = infile.read()
         stacks_text, moves_text = contents.split("\n\n")
-        stacks = self.parse_stacks(stacks_text)
+        stacks = self.parse_stacks(stacks_text, stacks_cls)
         stacks = self.parse_moves(stacks, moves_text, move_mode)
         return stacks
 
+    def parse_many(self, move_modes=(1, 2), stacks_cls=Stacks):
+        # Stream the moves once, applying each to one `Stacks` per move mode
+        # and keeping the parsed moves in `self.move_log` for later replays
+        with open(self.path, "r") as infile:
+            stacks_lines = []
+            for line in infile:
+                if not line.strip():
+                    break
+                stacks_lines.append(line.rstrip("\n"))
+            stacks_text = "\n".join(stacks_lines)
+            all_stacks = [self.parse_stacks(stacks_text, stacks_cls) for _ in move_modes]
+            moves = [
+                get_move_method(stacks, move_mode)
+                for stacks, move_mode in zip(all_stacks, move_modes)
+            ]
+            self.move_log = MoveLog()
+            for line in infile:
+                fields = line.split()
+                if not fields:
+                    continue
+                # Lines look like "move <num> from <source> to <target>"
+                num, source, target = int(fields[1]), int(fields[3]), int(fields[5])
+                self.move_log.add_move(num, source, target)
+                for move in moves:
+                    move(num, source, target)
+        return all_stacks
+
+
+def get_move_method(stacks, move_mode):
+    if move_mode == 1:
+        return stacks.move_1
+    elif move_mode == 2:
+        return stacks.move_2
+    raise ValueError(f"Invalid move mode: {move_mode}")
+
 
 if __name__ == "__main__":
     input_path = sys.argv[1]
+    parser = InputParser(input_path)
+    stacks_1, stacks_2 = parser.parse_many(move_modes=(1, 2), stacks_cls=RopeStacks)
     # Part 1
-    parser_1 = InputParser(input_path)
-    stacks_1 = parser_1.parse(move_mode=1)
     top_crates_1 = stacks_1.get_top_crates()
     print("Part 1:", top_crates_1)
     # Part 2
-    parser_2 = InputParser(input_path)
-    stacks_2 = parser_2.parse(move_mode=2)
     top_crates_2 = stacks_2.get_top_crates()
     print("Part 2:", top_crates_2)
@@ -1,7 +1,10 @@
 #!/usr/bin/env python3
 
+import os
 import sys
 
+import numpy as np
+
 
 class InputParser:
 
@@ -11,24 +14,125 @@ class InputParser:
         self.path = path
 
     def parse(self, marker_len):
-        with open(self.path, "r") as infile:
+        with open(self.path, "rb") as infile:
             contents = infile.read()
         contents = contents.strip()
-        str_len = len(contents)
-        for i in range(str_len - marker_len - 1):
-            excerpt = contents[i:i+marker_len]
-            excerpt_set = set(excerpt)
-            if len(excerpt_set) == marker_len:
-                return i + marker_len
-        return -1
+        return self.find_marker(contents, marker_len)
+
+    def parse_many(self, marker_lens, chunk_size=2**16):
+        with open(self.path, "rb") as infile:
+            chunks = iter(lambda: infile.read(chunk_size), b"")
+            return self.find_markers(chunks, marker_lens)
+
+    @classmethod
+    def find_marker(cls, data: bytes, marker_len):
+        return cls.find_markers([data], [marker_len])[marker_len]
+
+    @staticmethod
+    def find_markers(chunks, marker_lens):
+        # Slide a window of distinct bytes, jumping its start past the last
+        # occurrence of any repeated byte. The window only depends on the
+        # data, so every marker length is found when the window first
+        # grows to that length. State carries over between chunks.
+        positions = {marker_len: -1 for marker_len in marker_lens}
+        pending = set(marker_lens)
+        last_seen = [-1] * 256
+        window_start = 0
+        offset = 0
+        for chunk in chunks:
+            # The datastream ends at the first newline, if any
+            chunk, newline, _ = chunk.partition(b"\n")
+            for index, byte in enumerate(chunk, offset):
+                if last_seen[byte] >= window_start:
+                    window_start = last_seen[byte] + 1
+                last_seen[byte] = index
+                window_len = index - window_start + 1
+                if window_len in pending:
+                    positions[window_len] = index + 1
+                    pending.remove(window_len)
+                    if not pending:
+                        return positions
+            offset += len(chunk)
+            if newline:
+                break
+        return positions
+
+    def load_array(self):
+        if os.path.getsize(self.path) == 0:
+            return np.zeros(0, dtype=np.uint8)
+        data = np.memmap(self.path, dtype=np.uint8, mode="r")
+        # Like `find_markers`, the datastream ends at the first newline
+        newlines = np.flatnonzero(data == ord("\n"))
+        if len(newlines):
+            data = data[:newlines[0]]
+        return data
+
+    def parse_all(self, marker_lens, block_size=2**20):
+        # Scan the file block by block. A window of distinct bytes is never
+        # longer than 256, so each block also looks back over the 256 bytes
+        # before it. The last position of each byte and the window start
+        # carry over between blocks.
+        if os.path.getsize(self.path) == 0:
+            return {k: np.zeros(0, dtype=np.int64) for k in marker_lens}
+        data = np.memmap(self.path, dtype=np.uint8, mode="r")
+        positions = {k: [] for k in marker_lens}
+        last_seen = np.full(256, -1, dtype=np.int64)
+        window_start = 0
+        for start in range(0, len(data), block_size):
+            block = data[start:start + block_size]
+            # Like `find_markers`, the datastream ends at the first newline
+            newlines = np.flatnonzero(block == ord("\n"))
+            if len(newlines):
+                block = block[:newlines[0]]
+            lookback = min(start, 256)
+            run_lens, window_start = self.calc_distinct_run_lengths(
+                data[start - lookback:start + len(block)],
+                offset=start - lookback,
+                last_seen=last_seen,
+                window_start=window_start,
+            )
+            run_lens = run_lens[lookback:]
+            for k in marker_lens:
+                positions[k].append(np.flatnonzero(run_lens >= k) + start + 1)
+            if len(newlines):
+                break
+        return {k: np.concatenate(positions[k]) for k in marker_lens}
+
+    @staticmethod
+    def calc_distinct_run_lengths(data, offset=0, last_seen=None, window_start=0):
+        # Length of the longest all-distinct window ending at each position
+        # of `data`, which starts at `offset` in the stream. `last_seen`
+        # holds the position of each byte before `data` (updated in place)
+        # and `window_start` the window start before `data`.
+        if last_seen is None:
+            last_seen = np.full(256, -1, dtype=np.int64)
+        if len(data) == 0:
+            return np.zeros(0, dtype=np.int64), window_start
+        # Find the previous occurrence of each byte by grouping positions
+        # by byte value with a stable sort
+        order = np.argsort(data, kind="stable")
+        sorted_data = data[order]
+        repeats = sorted_data[1:] == sorted_data[:-1]
+        previous = np.empty(len(data), dtype=np.int64)
+        previous[order[1:][repeats]] = order[:-1][repeats] + offset
+        # The first occurrences in `data` fall back to `last_seen`, unless
+        # that is already inside `data` (when `data` starts with a lookback)
+        firsts = np.concatenate(([True], ~repeats))
+        before = last_seen[sorted_data[firsts]]
+        previous[order[firsts]] = np.where(before < offset, before, -1)
+        lasts = np.concatenate((~repeats, [True]))
+        last_seen[sorted_data[lasts]] = order[lasts] + offset
+        # A window is all-distinct if it starts after every earlier repeat
+        window_starts = np.maximum(np.maximum.accumulate(previous) + 1, window_start)
+        run_lens = np.arange(offset, offset + len(data)) - window_starts + 1
+        return run_lens, int(window_starts[-1])
 
 
 if __name__ == "__main__":
     input_path = sys.argv[1]
     parser = InputParser(input_path,)
+    positions = parser.parse_many(marker_lens=[4, 14])
     # Part 1
-    result = parser.parse(marker_len=4)
-    print("Part 1:", result)
+    print("Part 1:", positions[4])
     # Part 2
-    result = parser.parse(marker_len=14)
-    print("Part 2:", result)
+    print("Part 2:", positions[14])
@@ -1,13 +1,22 @@
 #!/usr/bin/env python3
 
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+import json
 import sys
-from typing import Mapping
+from typing import Mapping, Sequence
 
 
 class Node:
+    __slots__ = ("parent", "name", "is_file", "size", "file_size", "children")
+
     name: str
     is_file: bool
+    # Total size of everything under this directory. With a deferred
+    # `FileTree`, this is only valid after `FileTree.update_sizes()`
     size: int
+    # Total size of the files directly inside this directory
+    file_size: int
     children: Mapping
 
     def __init__(self, parent, name, is_file, size=None) -> None:
@@ -15,6 +24,7 @@ class Node:
         self.name = name
         self.is_file = is_file
         self.size = size or 0
+        self.file_size = 0
         self.children = {}
 
     def add_child(self, child_node):
@@ -30,87 +40,237 @@ class Node:
 class FileTree:
     root: Node
     space: int
+    # Whether directory sizes are updated on every file insertion, or
+    # aggregated in a single pass the next time they are needed
+    incremental: bool
+    sizes_outdated: bool
 
-    def __init__(self) -> None:
+    def __init__(self, incremental=False) -> None:
         self.root = Node(None, "/", False)
         self.space = 70000000
+        self.incremental = incremental
+        self.sizes_outdated = False
 
-    def add_node(cls, parent, name, is_file, size=None):
+    def add_node(self, parent, name, is_file, size=None):
         if parent.has_child(name):
             return parent.get_child(name)
         node = Node(parent, name, is_file, size)
         if is_file:
-            current_node = parent
-            while current_node is not None:
-                current_node.size += size
-                current_node = current_node.parent
+            parent.file_size += size
+            if self.incremental:
+                current_node = parent
+                while current_node is not None:
+                    current_node.size += size
+                    current_node = current_node.parent
+            else:
+                self.sizes_outdated = True
         else: # add dir
             parent.add_child(node)
         return node
 
+    def aggregate_sizes(self):
+        # Children are visited before their parents in post-order
+        for node in self._iter_post_order(self.root):
+            node.size = node.file_size
+            for child in node.children.values():
+                if not child.is_file:
+                    node.size += child.size
+        self.sizes_outdated = False
+
+    def update_sizes(self):
+        if self.sizes_outdated:
+            self.aggregate_sizes()
+
     def calc_size(self, max_size=100000):
+        self.update_sizes()
         return self._calc_size(self.root, max_size)
 
     @classmethod
     def _calc_size(cls, node, max_size):
-        if node.is_file:
-            return 0
         total_size = 0
-        if node.size <= max_size:
-            total_size = node.size
-        for child in node.children.values():
-            size = cls._calc_size(child, max_size)
-            total_size += size
+        for dir_node in cls._iter_post_order(node):
+            if dir_node.size <= max_size:
+                total_size += dir_node.size
         return total_size
 
     @classmethod
-    def _print_tree(cls, node, indent=0):
-        current_node = node
+    def _iter_post_order(cls, node):
+        # Iterative post-order walk over directories (avoids recursion limits)
+        if node.is_file:
+            return
+        stack = [(node, False)]
+        while stack:
+            current_node, children_done = stack.pop()
+            if children_done:
+                yield current_node
+                continue
+            stack.append((current_node, True))
+            for child in reversed(current_node.children.values()):
+                if not child.is_file:
+                    stack.append((child, False))
+
+    @classmethod
+    def _iter_pre_order(cls, node):
+        # Iterative pre-order walk over directories (parents before children)
+        if node.is_file:
+            return
+        stack = [node]
+        while stack:
+            current_node = stack.pop()
+            yield current_node
+            for child in reversed(current_node.children.values()):
+                if not child.is_file:
+                    stack.append(child)
+
+    def to_records(self):
+        # Flatten directories into (parent index, name, file size) records,
+        # with each parent listed before its children
+        indices = {}
+        records = []
+        for index, node in enumerate(self._iter_pre_order(self.root)):
+            indices[node] = index
+            parent_index = indices[node.parent] if node.parent else -1
+            records.append((parent_index, node.name, node.file_size))
+        return records, indices
+
+    @classmethod
+    def from_records(cls, records, incremental=False):
+        tree = cls(incremental)
+        nodes = []
+        for parent_index, name, file_size in records:
+            if parent_index < 0:
+                node = tree.root
+            else:
+                parent = nodes[parent_index]
+                node = Node(parent, name, False)
+                parent.add_child(node)
+            node.file_size = file_size
+            nodes.append(node)
+        tree.aggregate_sizes()
+        return tree, nodes
+
+    def _print_tree(self, node, indent=0):
+        self.update_sizes()
         if indent == 0:
             print('Root: ', node.name)
-        for child_name in current_node.children.keys():
-            child_node = node.get_child(child_name)
-            indent_str = ' ' * indent
+        stack = [(child, indent) for child in reversed(node.children.values())]
+        while stack:
+            child_node, child_indent = stack.pop()
+            indent_str = ' ' * child_indent
             print(indent_str, '|--', child_node.name, ' ', child_node.size)
-            cls._print_tree(child_node, indent + 2)
+            for grandchild in reversed(child_node.children.values()):
+                stack.append((grandchild, child_indent + 2))
+
+    def build_size_index(self):
+        self.update_sizes()
+        sizes = [node.size for node in self._iter_post_order(self.root)]
+        return DirSizeIndex(sizes, self.root.size, self.space)
 
     def calc_remaining_space(self):
+        self.update_sizes()
         return self.space - self.root.size
 
     def find_smallest_dir_for_update(self, update_size=30000000):
+        self.update_sizes()
         needed_space = update_size - self.calc_remaining_space()
         return self._find_smallest_dir_for_update(self.root, self.root.size, needed_space)
 
     def _find_smallest_dir_for_update(self, node, smallest_size, needed_space):
-        if node.is_file:
-            return smallest_size
-        if node.size < needed_space:
-            return smallest_size
-        smallest_size = min(smallest_size, node.size)
-        for child in node.children.values():
-            new_size = self._find_smallest_dir_for_update(child, smallest_size, needed_space)
-            smallest_size = min(smallest_size, new_size)
+        stack = [node]
+        while stack:
+            current_node = stack.pop()
+            # Subdirectories can only be smaller, so prune the whole subtree
+            if current_node.is_file or current_node.size < needed_space:
+                continue
+            smallest_size = min(smallest_size, current_node.size)
+            stack.extend(current_node.children.values())
         return smallest_size
 
 
+class DirSizeIndex:
+    # Sizes of every directory (including the root) in increasing order
+    sizes: Sequence[int]
+    # `prefix_sums[i]` is the total of the `i` smallest directory sizes
+    prefix_sums: Sequence[int]
+    root_size: int
+    space: int
+
+    def __init__(self, sizes, root_size, space) -> None:
+        self.sizes = sorted(sizes)
+        self.prefix_sums = list(accumulate(self.sizes, initial=0))
+        self.root_size = root_size
+        self.space = space
+
+    def calc_size(self, max_size=100000):
+        num_dirs = bisect_right(self.sizes, max_size)
+        return self.prefix_sums[num_dirs]
+
+    def find_smallest_dir_for_update(self, update_size=30000000):
+        needed_space = update_size - (self.space - self.root_size)
+        index = bisect_left(self.sizes, needed_space)
+        if index == len(self.sizes):
+            return self.root_size
+        return self.sizes[index]
+
+
 class Parser:
-    def __init__(self, path) -> None:
+    def __init__(self, path, incremental=False, snapshot_path=None, follow=False) -> None:
         self.path = path
-        self.tree = FileTree()
-        self.cwd  = None
+        # In follow mode the transcript may still be being written to
+        self.follow = follow
+        # Byte offset in the transcript up to which lines have been parsed
+        self.offset = 0
+        if snapshot_path is not None:
+            self.load_snapshot(snapshot_path, incremental)
+        else:
+            self.tree = FileTree(incremental)
+            self.cwd  = None
         self.parse_input()
 
-    def parse_input(self):
-        with open(self.path, "r") as infile:
+    def parse_input(self, follow=None):
+        # Only parse lines after `self.offset` (e.g. appended since a
+        # snapshot). When following a transcript, a last line without a
+        # newline may still be being written, so it is left for the next
+        # call. Otherwise it is parsed like any other line.
+        if follow is None:
+            follow = self.follow
+        with open(self.path, "rb") as infile:
+            infile.seek(self.offset)
             for line in infile:
-                line = line.strip()
+                if follow and not line.endswith(b"\n"):
+                    break
+                self.offset += len(line)
+                line = line.decode().strip()
+                if not line:
+                    continue
                 if line.startswith("$ cd"):
                     self.parse_cd(line)
                 elif line.startswith("$ ls"):
                     pass
                 else:
                     self.parse_ls_output(line)
+        # Aggregate deferred directory sizes once the whole input is parsed
+        self.tree.update_sizes()
+
+    def save_snapshot(self, snapshot_path):
+        records, indices = self.tree.to_records()
+        snapshot = {
+            "offset": self.offset,
+            "cwd": indices[self.cwd] if self.cwd else -1,
+            "space": self.tree.space,
+            "dirs": records,
+        }
+        with open(snapshot_path, "w") as outfile:
+            json.dump(snapshot, outfile, separators=(",", ":"))
 
+    def load_snapshot(self, snapshot_path, incremental=False):
+        with open(snapshot_path, "r") as infile:
+            snapshot = json.load(infile)
+        self.tree, nodes = FileTree.from_records(snapshot["dirs"], incremental)
+        self.tree.space = snapshot["space"]
+        cwd_index = snapshot["cwd"]
+        self.cwd = nodes[cwd_index] if cwd_index >= 0 else None
+        self.offset = snapshot["offset"]
 
     def parse_cd(self, line):
         _, _, folder = line.split(" ")
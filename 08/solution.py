@@ -23,6 +23,27 @@ class Forest:
                     visible_trees.append((row, col))
         return visible_trees
 
+    def calc_visibility_mask(self):
+        # A tree is visible from a direction if it is taller than the running
+        # maximum of the trees before it (-1 at the edges)
+        grid = self.grid
+        visible = np.zeros(grid.shape, dtype=bool)
+        for axis in (0, 1):
+            for flipped in (False, True):
+                heights = np.flip(grid, axis) if flipped else grid
+                running_max = np.maximum.accumulate(heights, axis=axis)
+                # Shift by one so each tree only compares against those before it
+                edge_shape = list(heights.shape)
+                edge_shape[axis] = 1
+                edge = np.full(edge_shape, -1, dtype=running_max.dtype)
+                before_max = np.concatenate([edge, running_max], axis=axis)
+                before_max = np.delete(before_max, -1, axis=axis)
+                direction_visible = heights > before_max
+                if flipped:
+                    direction_visible = np.flip(direction_visible, axis)
+                visible |= direction_visible
+        return visible
+
     def _generate_views(self, row, col, inward=True):
         views = [
             self.grid[ :row      , col:col+1 ],  # Top view
@@ -81,6 +102,35 @@ class Forest:
                 scenic_scores.append(scenic_score)
         return scenic_scores
 
+    @staticmethod
+    def _calc_viewing_distances(heights):
+        # Distance to the nearest earlier tree at least as tall (or to the
+        # edge), keeping a stack of indices with non-increasing heights
+        distances = []
+        stack = []
+        for index, height in enumerate(heights):
+            while stack and heights[stack[-1]] < height:
+                stack.pop()
+            distances.append(index - stack[-1] if stack else index)
+            stack.append(index)
+        return distances
+
+    def calc_scenic_score_matrix(self):
+        scenic_scores = np.ones(self.grid.shape, dtype=np.int64)
+        # Left/right views along rows, then top/bottom views along columns
+        for lines, transposed in ((self.grid, False), (self.grid.T, True)):
+            lines = lines.tolist()
+            before = [self._calc_viewing_distances(line) for line in lines]
+            after = [self._calc_viewing_distances(line[::-1])[::-1] for line in lines]
+            distances = np.array(before) * np.array(after)
+            scenic_scores *= distances.T if transposed else distances
+        return scenic_scores
+
+    def find_most_scenic_tree(self):
+        scenic_scores = self.calc_scenic_score_matrix()
+        row, col = np.unravel_index(np.argmax(scenic_scores), scenic_scores.shape)
+        return (int(row), int(col)), int(scenic_scores[row, col])
+
 
 class InputParser:
 
@@ -104,7 +154,7 @@ if __name__ == "__main__":
     # Part 1
     parser = InputParser(input_path)
     forest = parser.parse()
-    visible_trees = forest.find_visible_trees()
-    print("Part 1:", len(visible_trees))
-    scenic_scores = forest.calc_scenic_scores()
-    print("Part 2:", max(scenic_scores))
+    visibility_mask = forest.calc_visibility_mask()
+    print("Part 1:", np.count_nonzero(visibility_mask))
+    _, max_scenic_score = forest.find_most_scenic_tree()
+    print("Part 2:", max_scenic_score)
@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
 
-from collections.abc import Sequence
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
 import sys
 
 
@@ -103,14 +106,28 @@ class Coordinate:
 
 
 class RopeGrid:
-    knots: Sequence[Coordinate]
+    # Knot positions are kept in two flat lists of ints (head first), and
+    # each knot steps towards the previous one by the sign of the gap
+    rows: Sequence[int]
+    cols: Sequence[int]
     max_distance: int
+    # Every tail position, only recorded when `keep_history` is set
     tail_history: Sequence[Sequence]
+    # Unique cells visited by each tracked knot index
+    visited: Mapping[int, set]
 
-    def __init__(self, rope_length, size) -> None:
-        self.knots = [Coordinate() for x in range(rope_length)]
+    direction_steps: Mapping = {
+        "U": (1, 0),
+        "D": (-1, 0),
+        "L": (0, -1),
+        "R": (0, 1),
+    }
+
+    def __init__(self, rope_length, size, tracked_knots=None, keep_history=False) -> None:
+        self.rows = [0] * rope_length
+        self.cols = [0] * rope_length
         self.size = size
-        self.tail_history = []
+        self.init_tracking(rope_length, tracked_knots, keep_history)
         self.snapshot()
         # self.print("Initial State")
 
@@ -119,15 +136,15 @@ class RopeGrid:
         width = max(self.size, current_width)
         height = max(self.size, current_height)
         grid = [["•" for _ in range(width)] for _ in range(height)]
-        for index in range(len(self.knots)-1, -1, -1):
+        knot_coordinates = self.get_knot_coordinates()
+        for index in range(len(knot_coordinates)-1, -1, -1):
             if index == 0:
                 name = "H"
-            elif index == len(self.knots) - 1:
+            elif index == len(knot_coordinates) - 1:
                 name = "T"
             else:
                 name = str(index)
-            knot = self.knots[index]
-            row, col = knot.get_coordinates()
+            row, col = knot_coordinates[index]
             grid[row][col] = name
         text_list = []
         for row in reversed(grid):
@@ -141,8 +158,7 @@ class RopeGrid:
     def get_grid_size(self):
         min_row, max_row = 0, 0
         min_col, max_col = 0, 0
-        for knot in self.knots:
-            row, col = knot.get_coordinates()
+        for row, col in self.get_knot_coordinates():
             min_row = min(min_row, row)
             max_row = max(max_row, row)
             min_col = min(min_col, col)
@@ -151,21 +167,225 @@ class RopeGrid:
         width  = max_col - min_col + 1
         return (height, width)
 
+    def get_knot_coordinates(self):
+        return list(zip(self.rows, self.cols))
+
+    def init_tracking(self, rope_length, tracked_knots, keep_history):
+        # Track the tail by default (negative indices count from the tail)
+        if tracked_knots is None:
+            tracked_knots = [-1]
+        self.rope_length = rope_length
+        tracked_knots = [self.normalize_knot_index(index) for index in tracked_knots]
+        self.visited = {index: set() for index in tracked_knots}
+        self.keep_history = keep_history
+        self.tail_history = []
+
+    def normalize_knot_index(self, index):
+        if not -self.rope_length <= index < self.rope_length:
+            raise IndexError(f"Knot index {index} out of range.")
+        return index % self.rope_length
+
+    def count_visited(self, knot_index=-1):
+        return len(self.visited[self.normalize_knot_index(knot_index)])
+
     def snapshot(self):
-        tail_coords = self.knots[-1].get_coordinates()
-        self.tail_history.append(tail_coords)
+        rows, cols = self.rows, self.cols
+        for index, cells in self.visited.items():
+            cells.add((rows[index], cols[index]))
+        if self.keep_history:
+            self.tail_history.append((rows[-1], cols[-1]))
+
+    def get_step(self, direction):
+        try:
+            return self.direction_steps[direction.upper()]
+        except KeyError:
+            raise ValueError("Invalid direction.")
+
+    def step(self, row_step, col_step):
+        rows, cols = self.rows, self.cols
+        rows[0] += row_step
+        cols[0] += col_step
+        for index in range(1, len(rows)):
+            vdist = rows[index - 1] - rows[index]
+            hdist = cols[index - 1] - cols[index]
+            # Knots further down can't move if this one doesn't
+            if -1 <= vdist <= 1 and -1 <= hdist <= 1:
+                break
+            # Step one cell towards the previous knot along each axis
+            rows[index] += (vdist > 0) - (vdist < 0)
+            cols[index] += (hdist > 0) - (hdist < 0)
+        self.snapshot()
 
     def move(self, direction, distance):
-        head = self.knots[0]
+        row_step, col_step = self.get_step(direction)
         for _ in range(distance):
-            head.move(direction)
-            for index, knot in enumerate(self.knots[1:], 1):
-                previous_knot = self.knots[index-1]
-                knot.follow(previous_knot)
-            self.snapshot()
+            self.step(row_step, col_step)
             # self.print(f"{direction} {distance}")
 
 
+class RowIntervalSet:
+    # Disjoint, sorted column intervals for each row, as parallel lists of
+    # interval starts and ends (inclusive)
+    rows: Mapping[int, tuple[list, list]]
+    size: int
+
+    def __init__(self) -> None:
+        self.rows = {}
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, cell):
+        row, col = cell
+        if row not in self.rows:
+            return False
+        starts, ends = self.rows[row]
+        index = bisect_right(starts, col) - 1
+        return index >= 0 and col <= ends[index]
+
+    def add(self, cell):
+        row, col = cell
+        self.add_interval(row, col, col)
+
+    def add_interval(self, row, start, end):
+        starts, ends = self.rows.setdefault(row, ([], []))
+        # Intervals `lo` to `hi - 1` overlap or touch the new interval
+        lo = bisect_left(ends, start - 1)
+        hi = bisect_right(starts, end + 1)
+        removed_size = 0
+        if lo < hi:
+            start = min(start, starts[lo])
+            end = max(end, ends[hi - 1])
+            for index in range(lo, hi):
+                removed_size += ends[index] - starts[index] + 1
+        starts[lo:hi] = [start]
+        ends[lo:hi] = [end]
+        self.size += end - start + 1 - removed_size
+
+
+class SegmentCellSet:
+    # Cells as horizontal runs kept per row and vertical runs kept per
+    # column (a transposed `RowIntervalSet`), so a run of any length is a
+    # single interval insert. A cell covered by both a row and a column
+    # interval is only counted once, by sweeping over the rows when the
+    # size is asked for.
+    horizontal: RowIntervalSet
+    vertical: RowIntervalSet
+    cached_size: int
+
+    def __init__(self) -> None:
+        self.horizontal = RowIntervalSet()
+        self.vertical = RowIntervalSet()
+        self.cached_size = 0
+
+    def __len__(self):
+        if self.cached_size is None:
+            overlap = self.count_overlap()
+            self.cached_size = len(self.horizontal) + len(self.vertical) - overlap
+        return self.cached_size
+
+    def __contains__(self, cell):
+        row, col = cell
+        return cell in self.horizontal or (col, row) in self.vertical
+
+    def add(self, cell):
+        self.horizontal.add(cell)
+        self.cached_size = None
+
+    def add_segment(self, start_cell, end_cell):
+        # Add a horizontal or vertical line of cells (inclusive)
+        (start_row, start_col), (end_row, end_col) = start_cell, end_cell
+        if start_row == end_row:
+            self.horizontal.add_interval(
+                start_row, min(start_col, end_col), max(start_col, end_col)
+            )
+        else:
+            self.vertical.add_interval(
+                start_col, min(start_row, end_row), max(start_row, end_row)
+            )
+        self.cached_size = None
+
+    def count_overlap(self):
+        # Count the crossings of row and column intervals. Column intervals
+        # are opened and closed while sweeping over the rows, and each row
+        # interval counts the open ones in its range of columns with a
+        # Fenwick tree over the columns.
+        columns = sorted(self.vertical.rows)
+        column_indices = {col: index for index, col in enumerate(columns)}
+        events = []
+        for col, (starts, ends) in self.vertical.rows.items():
+            index = column_indices[col]
+            for start, end in zip(starts, ends):
+                events.append((start, 1, index, 1))
+                events.append((end + 1, 0, index, -1))
+        for row, (starts, ends) in self.horizontal.rows.items():
+            for start, end in zip(starts, ends):
+                events.append((row, 2, start, end))
+        events.sort()
+        tree = [0] * (len(columns) + 1)
+
+        def count_open(stop):
+            total = 0
+            while stop > 0:
+                total += tree[stop]
+                stop -= stop & -stop
+            return total
+
+        overlap = 0
+        for _, kind, first, second in events:
+            if kind == 2:
+                lo = bisect_left(columns, first)
+                hi = bisect_right(columns, second)
+                overlap += count_open(hi) - count_open(lo)
+            else:
+                position = first + 1
+                while position < len(tree):
+                    tree[position] += second
+                    position += position & -position
+        return overlap
+
+
+class SegmentRopeGrid(RopeGrid):
+    # Once the rope lies straight behind the head along the direction of a
+    # move, the rest of the move shifts every knot along a line, so it is
+    # applied in one go instead of one step at a time, and the cells it
+    # covers are added to each tracked knot's visited cells as one segment.
+    visited: Mapping[int, SegmentCellSet]
+
+    def init_tracking(self, rope_length, tracked_knots, keep_history):
+        super().init_tracking(rope_length, tracked_knots, keep_history)
+        self.visited = {index: SegmentCellSet() for index in self.visited}
+
+    def is_straight(self, row_step, col_step):
+        rows, cols = self.rows, self.cols
+        for index in range(1, len(rows)):
+            if rows[index] != rows[index - 1] - row_step:
+                return False
+            if cols[index] != cols[index - 1] - col_step:
+                return False
+        return True
+
+    def move(self, direction, distance):
+        row_step, col_step = self.get_step(direction)
+        rows, cols = self.rows, self.cols
+        remaining = distance
+        while remaining > 0:
+            # Every position is needed when keeping the full tail history
+            if not self.keep_history and self.is_straight(row_step, col_step):
+                row_shift, col_shift = remaining * row_step, remaining * col_step
+                for index, cells in self.visited.items():
+                    first_cell = (rows[index] + row_step, cols[index] + col_step)
+                    last_cell = (rows[index] + row_shift, cols[index] + col_shift)
+                    cells.add_segment(first_cell, last_cell)
+                for index in range(len(rows)):
+                    rows[index] += row_shift
+                    cols[index] += col_shift
+                break
+            self.step(row_step, col_step)
+            remaining -= 1
+
+
 class InputParser:
 
     path: str
@@ -173,8 +393,10 @@ class InputParser:
     def __init__(self, path) -> None:
         self.path = path
 
-    def parse(self, rope_length, grid_size=5):
-        grid = RopeGrid(rope_length, grid_size)
+    def parse(
+        self, rope_length, grid_size=5, grid_cls=RopeGrid, tracked_knots=None, keep_history=False
+    ):
+        grid = grid_cls(rope_length, grid_size, tracked_knots, keep_history)
         with open(self.path, "r") as infile:
             for line in infile:
                 line = line.strip()
@@ -183,17 +405,63 @@ class InputParser:
                 grid.move(direction, distance)
         return grid
 
+    def parse_moves(self):
+        # Compact move list: one direction byte and one distance per line
+        directions = bytearray()
+        distances = array("l")
+        with open(self.path, "r") as infile:
+            for line in infile:
+                line = line.strip()
+                direction, distance = line.split(" ")
+                directions += direction.encode()
+                distances.append(int(distance))
+        return directions, distances
+
+    @staticmethod
+    def simulate(moves, rope_length, grid_size=5, grid_cls=RopeGrid, tracked_knots=None):
+        grid = grid_cls(rope_length, grid_size, tracked_knots)
+        directions, distances = moves
+        for direction, distance in zip(directions.decode(), distances):
+            grid.move(direction, distance)
+        return grid
+
+    def count_tail_visits(self, rope_lengths: Iterable[int], grid_cls=SegmentRopeGrid):
+        # Knot `n - 1` of the longest rope follows the same path as the tail
+        # of a rope of length `n`, so a single simulation covers every length
+        rope_lengths = sorted(set(rope_lengths))
+        if not rope_lengths:
+            raise ValueError("At least one rope length is required.")
+        if rope_lengths[0] < 1:
+            raise ValueError(f"Invalid rope length {rope_lengths[0]}.")
+        tracked_knots = [n - 1 for n in rope_lengths]
+        moves = self.parse_moves()
+        grid = self.simulate(
+            moves, rope_lengths[-1], grid_cls=grid_cls, tracked_knots=tracked_knots
+        )
+        return {n: grid.count_visited(n - 1) for n in rope_lengths}
+
+
+def count_tail_visits_in_file(path, rope_lengths):
+    return InputParser(path).count_tail_visits(rope_lengths)
+
+
+def count_tail_visits_in_files(paths, rope_lengths, workers=None):
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [
+            executor.submit(count_tail_visits_in_file, path, rope_lengths)
+            for path in paths
+        ]
+        return {path: future.result() for path, future in zip(paths, futures)}
+
 
 if __name__ == "__main__":
     input_path = sys.argv[1]
     parser = InputParser(input_path)
     # Part 1
     grid_1 = parser.parse(rope_length=2)
-    tail_visits_1 = list(set(grid_1.tail_history))
-    print("Part 1:", len(tail_visits_1))
+    print("Part 1:", grid_1.count_visited())
     grid_1.print("Final State")
     # Part 2
     grid_2 = parser.parse(rope_length=10, grid_size=6)
-    tail_visits_2 = list(set(grid_2.tail_history))
-    print("Part 2:", len(tail_visits_2))
+    print("Part 2:", grid_2.count_visited())
     grid_2.print("Final State")
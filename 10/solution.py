@@ -1,14 +1,71 @@
 #!/usr/bin/env python3
 
 from abc import ABC, abstractmethod
-from collections.abc import Sequence
+from collections.abc import Iterable, Mapping, Sequence
+from itertools import count
 import sys
 
+import numpy as np
+
+
+class Subscription:
+    # Cycles an observer wants to hear about, buffered until `batch_size`
+    # values can be delivered in a single `update_batch` call
+    next_cycle: int | None
+    batch_size: int
+    cycles: Sequence[int]
+    xs: Sequence[int]
+
+    def __init__(self, wanted_cycles: Iterable[int] | None = None, batch_size=1) -> None:
+        self.wanted_cycles = iter(wanted_cycles if wanted_cycles is not None else count(1))
+        self.next_cycle = next(self.wanted_cycles, None)
+        self.batch_size = batch_size
+        self.cycles = []
+        self.xs = []
+
+    @classmethod
+    def every_cycle(cls, batch_size=1):
+        return cls(None, batch_size)
+
+    @classmethod
+    def every(cls, stride, start=1, batch_size=1):
+        return cls(count(start, stride), batch_size)
+
+    @classmethod
+    def at(cls, cycles: Iterable[int], batch_size=1):
+        return cls(sorted(set(cycles)), batch_size)
+
+    def skip_to(self, cycle):
+        while self.next_cycle is not None and self.next_cycle < cycle:
+            self.next_cycle = next(self.wanted_cycles, None)
+
+    def add(self, cycle, x):
+        self.cycles.append(cycle)
+        self.xs.append(x)
+        self.next_cycle = next(self.wanted_cycles, None)
+        return len(self.cycles) >= self.batch_size
+
+    def drain(self):
+        cycles, xs = self.cycles, self.xs
+        self.cycles, self.xs = [], []
+        return cycles, xs
+
 
 class Observer(ABC):
     @abstractmethod
     def update(self, cycle, x): ...
 
+    def update_batch(self, cycles, xs):
+        for cycle, x in zip(cycles, xs):
+            self.update(cycle, x)
+
+    def subscribe(self):
+        return Subscription.every_cycle()
+
+    def finish(self, num_cycles):
+        # Called once the program has run, with its total number of cycles
+        pass
+
 
 class Subject(ABC):
     @abstractmethod
@@ -24,12 +81,12 @@ class Subject(ABC):
 class CPU(Subject):
     cycle: int
     x: int
-    observers: Observer
+    observers: Mapping[Observer, Subscription]
 
     def __init__(self) -> None:
         self.cycle = 0
         self.x = 1
-        self.observers = set()
+        self.observers = {}
 
     def execute_noop(self):
         # Cycle 1
@@ -56,37 +113,84 @@ class CPU(Subject):
         pass
 
     def register_observer(self, observer: Observer):
-        return self.observers.add(observer)
+        subscription = observer.subscribe()
+        # Cycles that have already started can't be delivered anymore
+        subscription.skip_to(self.cycle + 1)
+        self.observers[observer] = subscription
 
     def remove_observer(self, observer: Observer):
-        return self.observers.remove(observer)
+        self.flush_observer(observer)
+        del self.observers[observer]
 
     def notify_observers(self):
+        for observer, subscription in self.observers.items():
+            if subscription.next_cycle != self.cycle:
+                continue
+            if subscription.add(self.cycle, self.x):
+                self.flush_observer(observer)
+
+    def flush_observer(self, observer: Observer):
+        cycles, xs = self.observers[observer].drain()
+        if cycles:
+            observer.update_batch(cycles, xs)
+
+    def flush_observers(self):
+        # Deliver values still buffered for observers with partial batches
         for observer in self.observers:
-            observer.update(self.cycle, self.x)
+            self.flush_observer(observer)
+
+    def finish(self):
+        self.flush_observers()
+        for observer in self.observers:
+            observer.finish(self.cycle)
 
 
 class Tracker(Observer):
     history: Sequence
-
-    def __init__(self) -> None:
+    start: int
+    stride: int
+    # Whether to record every cycle or only the sampled ones
+    full_history: bool
+    # Total number of cycles, known once the program has finished
+    num_cycles: int | None
+
+    def __init__(self, start=20, stride=40, full_history=False) -> None:
+        self.start = start
+        self.stride = stride
+        self.full_history = full_history
         self.reset()
 
+    def subscribe(self):
+        if self.full_history:
+            return Subscription.every_cycle()
+        return Subscription.every(self.stride, self.start)
+
     def update(self, cycle, x):
         self.history.append((cycle, x))
 
+    def finish(self, num_cycles):
+        self.num_cycles = num_cycles
+
     def calc_signal_strength(self):
-        total_signal_strength = 0
-        for position in range(20, len(self.history), 40):
-            index = position - 1
-            _, x = self.history[index]
-            signal_strength = position * x
-            total_signal_strength += signal_strength
-            # print(position, x, signal_strength, sep=", ")
-        return total_signal_strength
+        if not self.full_history:
+            if self.num_cycles is None:
+                raise ValueError("Sampled signal strength needs a finished program.")
+            # Like the timeline version, leave out a sample on the last cycle
+            return sum(
+                cycle * x for cycle, x in self.history if cycle < self.num_cycles
+            )
+        timeline = np.array([x for _, x in self.history], dtype=np.int64)
+        return self.calc_signal_strength_from_timeline(timeline, self.start, self.stride)
+
+    @staticmethod
+    def calc_signal_strength_from_timeline(timeline, start=20, stride=40):
+        # `timeline[i]` is the value of X during cycle `i + 1`
+        positions = np.arange(start, len(timeline), stride)
+        return int(np.sum(positions * timeline[positions - 1]))
 
     def reset(self):
         self.history = []
+        self.num_cycles = None
 
 
 class CRT(Observer):
@@ -103,6 +207,10 @@ class CRT(Observer):
         self.sprite_center = 1
         self.cursor = [0, 0]
 
+    def subscribe(self):
+        # Pixels are drawn one screen row at a time
+        return Subscription.every_cycle(batch_size=self.width)
+
     def update(self, cycle, x):
         # print(f"Cycle {cycle} / X = {x}")
         self.sprite_center = x
@@ -131,6 +239,21 @@ class CRT(Observer):
         elif cursor_col >= max_col_index and cursor_row >= max_row_index:
             self.cursor = [0, 0]
 
+    def render_timeline(self, timeline):
+        # Only the last full screen of cycles determines the final pixels
+        num_pixels = self.width * self.height
+        num_cycles = len(timeline)
+        first_cycle = max(num_cycles - num_pixels, 0)
+        cycles = np.arange(first_cycle, num_cycles)
+        pixels = cycles % num_pixels
+        rows, cols = pixels // self.width, pixels % self.width
+        is_lit = np.abs(cols - timeline[first_cycle:]) <= 1
+        for row, col, lit in zip(rows.tolist(), cols.tolist(), is_lit.tolist()):
+            self.screen[row][col] = "#" if lit else " "
+        if num_cycles:
+            self.sprite_center = int(timeline[-1])
+        self.cursor = list(divmod(num_cycles % num_pixels, self.width))
+
     def reset(self):
         self.screen = [["_" for _ in range(self.width)] for _ in range(self.height)]
 
@@ -159,23 +282,40 @@ class InputParser:
                     cpu.execute_addx(argument)
                 elif operation == "noop":
                     cpu.execute_noop()
+        cpu.finish()
+
+    def compile(self):
+        # Build the value of X during every cycle: each addx delta takes
+        # effect in the cycle after the one where the instruction completes
+        durations = []
+        deltas = []
+        with open(self.path, "r") as infile:
+            for line in infile:
+                line = line.strip()
+                operation, _, argument = line.partition(" ")
+                if operation == "addx":
+                    durations.append(2)
+                    deltas.append(int(argument))
+                elif operation == "noop":
+                    durations.append(1)
+                    deltas.append(0)
+        end_cycles = np.cumsum(durations, dtype=np.int64)
+        num_cycles = int(end_cycles[-1]) if len(end_cycles) else 0
+        cycle_deltas = np.zeros(num_cycles + 1, dtype=np.int64)
+        np.add.at(cycle_deltas, end_cycles, deltas)
+        return 1 + np.cumsum(cycle_deltas)[:num_cycles]
 
 
 if __name__ == "__main__":
     # Set up parser
     input_path = sys.argv[1]
     parser = InputParser(input_path)
+    timeline = parser.compile()
     # Part 1
-    cpu_1 = CPU()
-    tracker = Tracker()
-    cpu_1.register_observer(tracker)
-    parser.parse(cpu_1)
-    signal_strength = tracker.calc_signal_strength()
+    signal_strength = Tracker.calc_signal_strength_from_timeline(timeline)
     print("Part 1:", signal_strength)
     # Part 2
-    cpu_2 = CPU()
     crt = CRT()
-    cpu_2.register_observer(crt)
+    crt.render_timeline(timeline)
     print("Part 2:")
-    parser.parse(cpu_2)
     crt.print()